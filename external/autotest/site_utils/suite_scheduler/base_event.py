@@ -2,7 +2,11 @@
 # Use of this source code is governed by a BSD-style license that can be
 # found in the LICENSE file.
 
+import collections
+import contextlib
 import logging
+import time
+from multiprocessing import pool
 
 import common
 from autotest_lib.client.common_lib import priorities
@@ -22,6 +26,33 @@ _SECTION_SUFFIX = '_params'
 # Pattern of latest Launch Control build for a branch and a target.
 _LATEST_LAUNCH_CONTROL_BUILD_FMT = '%s/%s/LATEST'
 
+# Number of threads to use to translate LATEST Launch Control builds. Each
+# translate call is a devserver roundtrip, so issue them concurrently.
+_TRANSLATE_POOL_SIZE = 8
+
+# Seconds before a translated LATEST build expires. Matches the scheduler
+# loop interval, so each LATEST build is resolved at most once per tick.
+_TRANSLATE_CACHE_TTL_SECONDS = 5 * 60
+
+# Seconds before the picked devserver expires, matching the scheduler loop
+# interval. Picking per tick instead of per board keeps the load balancing
+# across ticks while avoiding repeated selection within one tick.
+_DEVSERVER_CACHE_TTL_SECONDS = 5 * 60
+
+# The randomly picked devserver shared by all Launch Control calls within
+# one scheduler tick, with the time it was picked.
+_cached_devserver = None
+_cached_devserver_time = 0
+
+# Cache of boolean config values, keyed on (id(config), section, option).
+# ConfigParser re-parses the raw value and runs interpolation on every
+# getboolean() call, and the values only change when the config is reread.
+_getboolean_cache = {}
+
+# Cache of parsed Launch Control targets. The same target strings come up
+# for every board on every scheduler tick, so parse each one only once.
+_parsed_target_cache = {}
+
 def SectionName(keyword):
     """Generate a section name for a *Event config stanza.
 
@@ -38,6 +69,52 @@ def HonoredSection(section):
     return section.endswith(_SECTION_SUFFIX)
 
 
+def _CachedGetboolean(config, section, option):
+    """Return config.getboolean(section, option), parsing each value once.
+
+    @param config: A ForgivingConfigParser instance.
+    @param section: Name of the config section.
+    @param option: Name of the option within the section.
+    """
+    key = (id(config), section, option)
+    if key not in _getboolean_cache:
+        _getboolean_cache[key] = config.getboolean(section, option)
+    return _getboolean_cache[key]
+
+
+def ClearGetbooleanCache():
+    """Drop cached config values; must be called after a config reread."""
+    _getboolean_cache.clear()
+
+
+def _GetAndroidBuildServer():
+    """Get a devserver for Launch Control calls, picked once per tick.
+
+    @return: An AndroidBuildServer instance.
+    """
+    global _cached_devserver, _cached_devserver_time
+    now = time.time()
+    if (_cached_devserver is None or
+            now - _cached_devserver_time >= _DEVSERVER_CACHE_TTL_SECONDS):
+        _cached_devserver = dev_server.AndroidBuildServer.random()
+        _cached_devserver_time = now
+    return _cached_devserver
+
+
+def _ParseLaunchControlTarget(target):
+    """Memoized version of utils.parse_launch_control_target.
+
+    @param target: Name of a Launch Control target, e.g., shamu-eng.
+
+    @return: (build_target, build_type), e.g., ('shamu', 'userdebug')
+    """
+    parsed = _parsed_target_cache.get(target)
+    if parsed is None:
+        parsed = utils.parse_launch_control_target(target)
+        _parsed_target_cache[target] = parsed
+    return parsed
+
+
 def BuildName(board, type, milestone, manifest):
     """Format a build name, given board, type, milestone, and manifest number.
 
@@ -59,9 +136,30 @@ class BaseEvent(object):
     @var _keyword: the keyword/name of this event, e.g. new_build, nightly.
     @var _mv: ManifestVersions instance used to query for new builds, etc.
     @var _always_handle: whether to make ShouldHandle always return True.
-    @var _tasks: set of Task instances that run on this event.
-                 Use a set so that instances that encode logically equivalent
-                 Tasks get de-duped before we even try to schedule them.
+    @var _tasks: dict mapping a task's identity key to the Task instance,
+                 so that instances that encode logically equivalent Tasks get
+                 de-duped before we even try to schedule them. Keying on the
+                 precomputed identity avoids Task.__hash__/__eq__ on every
+                 lookup.
+    @var _lc_branches_targets_cache: cached result of
+                 launch_control_branches_targets, or None if it needs to be
+                 rebuilt. The scheduler reads the property once per board per
+                 tick, so rebuilding it on every access is wasted work.
+    @var _tasks_list: cached list view of _tasks, or None if it needs to be
+                 rebuilt. Handle() is called once per board, so materializing
+                 the list on every call allocates needlessly.
+    @var _lc_parsed_targets_cache: cached dict of branch:[(target, board)]
+                 derived from launch_control_branches_targets, or None if it
+                 needs to be rebuilt. Saves re-parsing target strings in
+                 _LatestLaunchControlBuilds for every board.
+    @var _translated_build_cache: dict mapping a LATEST build name to
+                 (timestamp, translated build). Repeated ticks resolving the
+                 same LATEST build share one devserver roundtrip until the
+                 entry expires.
+    @var _tasks_by_board: dict mapping a board name to the set of identity
+                 keys of tasks that may apply to the board, built lazily per
+                 board. Saves Handle() from considering tasks whose board
+                 restrictions rule the board out.
     """
 
 
@@ -91,7 +189,8 @@ class BaseEvent(object):
         @param config: a ForgivingConfigParser instance.
         """
         section = SectionName(cls.KEYWORD)
-        return {'always_handle': config.getboolean(section, 'always_handle')}
+        return {'always_handle': _CachedGetboolean(config, section,
+                                                   'always_handle')}
 
 
     def __init__(self, keyword, manifest_versions, always_handle):
@@ -103,8 +202,13 @@ class BaseEvent(object):
         """
         self._keyword = keyword
         self._mv = manifest_versions
-        self._tasks = set()
+        self._tasks = {}
         self._always_handle = always_handle
+        self._lc_branches_targets_cache = None
+        self._lc_parsed_targets_cache = None
+        self._tasks_list = None
+        self._tasks_by_board = {}
+        self._translated_build_cache = {}
 
 
     @property
@@ -115,8 +219,8 @@ class BaseEvent(object):
 
     @property
     def tasks(self):
-        """Getter for private |self._tasks| property."""
-        return self._tasks
+        """Getter for the Task instances stored in |self._tasks|."""
+        return self._TasksAsList()
 
 
     @property
@@ -124,14 +228,39 @@ class BaseEvent(object):
         """Get a dict of branch:targets for Launch Control from all tasks.
 
         branch: Name of a Launch Control branch.
-        targets: A list of targets for the given branch.
+        targets: A list of unique targets for the given branch. Tasks often
+                 share targets, and duplicates would be parsed and translated
+                 repeatedly downstream.
+        """
+        if self._lc_branches_targets_cache is None:
+            branches = collections.defaultdict(list)
+            for task in self._tasks.itervalues():
+                for branch in task.launch_control_branches:
+                    targets = branches[branch]
+                    for target in task.launch_control_targets:
+                        if target not in targets:
+                            targets.append(target)
+            self._lc_branches_targets_cache = dict(branches)
+        return self._lc_branches_targets_cache
+
+
+    def _LaunchControlParsedTargets(self):
+        """Get a dict of branch:[(target, board)] for Launch Control.
+
+        Pairs each target from launch_control_branches_targets with the board
+        parsed out of it, so _LatestLaunchControlBuilds does not re-parse the
+        same target strings for every board.
+
+        @return: A dict mapping branch name to a list of (target, board)
+                tuples, e.g., {'git_mnc_release': [('shamu-eng', 'shamu')]}.
         """
-        branches = {}
-        for task in self._tasks:
-            for branch in task.launch_control_branches:
-                branches.setdefault(branch, []).extend(
-                        task.launch_control_targets)
-        return branches
+        if self._lc_parsed_targets_cache is None:
+            parsed_targets = {}
+            for branch, targets in self.launch_control_branches_targets.items():
+                parsed_targets[branch] = [
+                        (t, _ParseLaunchControlTarget(t)[0]) for t in targets]
+            self._lc_parsed_targets_cache = parsed_targets
+        return self._lc_parsed_targets_cache
 
 
     @tasks.setter
@@ -140,7 +269,80 @@ class BaseEvent(object):
 
         @param iterable_of_tasks: list of Task instances that can fire on this.
         """
-        self._tasks = set(iterable_of_tasks)
+        # setdefault keeps the first of logically equivalent instances, the
+        # same de-dup behavior a set would have.
+        tasks = {}
+        for task in iterable_of_tasks:
+            tasks.setdefault(task._IdentityKey(), task)
+        self._tasks = tasks
+        self._InvalidateTaskCaches()
+
+
+    def _InvalidateTaskCaches(self):
+        """Drop cached views derived from self._tasks.
+
+        Must be called by any code path that mutates self._tasks, so cached
+        properties get rebuilt on their next access.
+        """
+        self._lc_branches_targets_cache = None
+        self._lc_parsed_targets_cache = None
+        self._tasks_list = None
+        self._tasks_by_board = {}
+
+
+    @staticmethod
+    def _TaskBoards(task):
+        """Get the boards a task is restricted to run on.
+
+        A task constrains its boards through the boards setting and through
+        the boards encoded in its Launch Control targets; a task declaring
+        neither may run on any board.
+
+        @param task: A Task instance.
+
+        @return: A set of board names, or None if the task has no board
+                restriction.
+        """
+        boards = set(task.boards)
+        for target in task.launch_control_targets:
+            target_board = _ParseLaunchControlTarget(target)[0]
+            boards.add(utils.ANDROID_TARGET_TO_BOARD_MAP.get(target_board,
+                                                             target_board))
+        return boards or None
+
+
+    def _TaskKeysForBoard(self, board):
+        """Get identity keys of tasks that may apply to the given board.
+
+        Built lazily per board and cached until the tasks change.
+
+        @param board: the board to look up.
+
+        @return: A set of identity keys of tasks that may apply to the board.
+        """
+        keys = self._tasks_by_board.get(board)
+        if keys is None:
+            keys = set()
+            for task in self._tasks.itervalues():
+                boards = self._TaskBoards(task)
+                if boards is None or board in boards:
+                    keys.add(task._IdentityKey())
+            self._tasks_by_board[board] = keys
+        return keys
+
+
+    def _TasksAsList(self):
+        """Return a cached list view of self._tasks.
+
+        Callers must not mutate the returned list; task-mutating paths
+        invalidate the cache instead, so iteration over a previously
+        returned list stays safe.
+
+        @return: A list of all Task instances for this event.
+        """
+        if self._tasks_list is None:
+            self._tasks_list = self._tasks.values()
+        return self._tasks_list
 
 
     def Merge(self, to_merge):
@@ -216,7 +418,7 @@ class BaseEvent(object):
 
         @return: A list of tasks can run now.
         """
-        return list(self.tasks)
+        return self._TasksAsList()
 
 
     def Handle(self, scheduler, branch_builds, board, force=False,
@@ -235,17 +437,31 @@ class BaseEvent(object):
         @param force: Tell every Task to always Run().
         @param launch_control_builds: A list of Launch Control builds.
         """
-        logging.info('Handling %s for %s', self.keyword, board)
-        # we need to iterate over an immutable copy of self._tasks
-        tasks = list(self.tasks) if force else self.FilterTasks()
+        # Handle is called once per (event, board), so skip record creation
+        # outright when the level is disabled.
+        logger = logging.getLogger()
+        if logger.isEnabledFor(logging.INFO):
+            logging.info('Handling %s for %s', self.keyword, board)
+        # Iterate over a copy of self._tasks; removal below only invalidates
+        # the cached list, it never mutates a list already handed out.
+        if force:
+            # Forced runs skip the board index, so a task can be pushed to
+            # any board explicitly.
+            tasks = self._TasksAsList()
+        else:
+            applicable = self._TaskKeysForBoard(board)
+            tasks = [task for task in self.FilterTasks()
+                     if task._IdentityKey() in applicable]
         for task in tasks:
             if task.AvailableHosts(scheduler, board):
                 if not task.Run(scheduler, branch_builds, board, force,
                                 self._mv, launch_control_builds):
-                    self._tasks.remove(task)
+                    del self._tasks[task._IdentityKey()]
+                    self._InvalidateTaskCaches()
             elif task.ShouldHaveAvailableHosts():
-                logging.warning('Skipping %s on %s, due to lack of hosts.',
-                                task, board)
+                if logger.isEnabledFor(logging.WARNING):
+                    logging.warning('Skipping %s on %s, due to lack of hosts.',
+                                    task, board)
 
 
     def _LatestLaunchControlBuilds(self, board):
@@ -261,16 +477,49 @@ class BaseEvent(object):
         board = utils.ANDROID_BOARD_TO_TARGET_MAP.get(board, board)
         # Pick a random devserver based on tick, this is to help load balancing
         # across all devservers.
-        devserver = dev_server.AndroidBuildServer.random()
-        builds = []
-        for branch, targets in self.launch_control_branches_targets.items():
-            # targets is a list of Launch Control targets, e.g., shamu-eng.
-            # The first part should match the board name.
-            match_targets = [
-                    t for t in targets
-                    if board == utils.parse_launch_control_target(t)[0]]
-            for target in match_targets:
-                latest_build = (_LATEST_LAUNCH_CONTROL_BUILD_FMT %
-                                (branch, target))
-                builds.append(devserver.translate(latest_build))
-        return builds
+        devserver = _GetAndroidBuildServer()
+        latest_builds = []
+        for branch, targets in self._LaunchControlParsedTargets().items():
+            # targets is a list of (target, board) tuples with target being a
+            # Launch Control target, e.g., shamu-eng. The board parsed from
+            # the target should match the board name.
+            for target, target_board in targets:
+                if board != target_board:
+                    continue
+                latest_builds.append(_LATEST_LAUNCH_CONTROL_BUILD_FMT %
+                                     (branch, target))
+        return self._TranslateBuilds(devserver, latest_builds)
+
+
+    def _TranslateBuilds(self, devserver, latest_builds):
+        """Translate LATEST build names into the actual latest builds.
+
+        Each translate call is a roundtrip to the devserver and they are
+        independent of each other, so issue them concurrently when there is
+        more than one.
+
+        Translated builds are cached for _TRANSLATE_CACHE_TTL_SECONDS, so
+        scheduler ticks that resolve the same LATEST build within one
+        interval share a single devserver roundtrip.
+
+        @param devserver: The devserver to make translate calls against.
+        @param latest_builds: A list of build names in LATEST format.
+
+        @return: A list of translated builds, in the order of |latest_builds|.
+        """
+        now = time.time()
+        to_translate = [
+                b for b in latest_builds
+                if (b not in self._translated_build_cache or
+                    now - self._translated_build_cache[b][0] >=
+                    _TRANSLATE_CACHE_TTL_SECONDS)]
+        if len(to_translate) <= 1:
+            results = [devserver.translate(b) for b in to_translate]
+        else:
+            translate_pool = pool.ThreadPool(
+                    min(len(to_translate), _TRANSLATE_POOL_SIZE))
+            with contextlib.closing(translate_pool):
+                results = translate_pool.map(devserver.translate, to_translate)
+        for build, translated in zip(to_translate, results):
+            self._translated_build_cache[build] = (now, translated)
+        return [self._translated_build_cache[b][1] for b in latest_builds]
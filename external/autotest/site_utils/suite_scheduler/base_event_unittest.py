@@ -18,8 +18,11 @@ import task
 
 class FakeTask(task.Task):
     """A mock Task that can optionally expect triggering."""
-    def __init__(self, suite, build, pool, pymox):
-        super(FakeTask, self).__init__('Fake', suite, build, pool)
+    def __init__(self, suite, build, pool, pymox, boards=None,
+                 launch_control_targets=None):
+        super(FakeTask, self).__init__(
+                'Fake', suite, build, pool, boards=boards,
+                launch_control_targets=launch_control_targets)
         pymox.StubOutWithMock(self, 'Run')
 
 
@@ -90,6 +93,11 @@ class BaseEventTest(mox.MoxTestBase):
         event = self.CreateEvent()
         event.tasks = tasks
         self.assertEquals(len(event.tasks), len(self._TASKS))
+        # Of two logically equivalent instances, the first one assigned is
+        # the one retained.
+        kept = [t for t in event.tasks if t == tasks[0]]
+        self.assertEquals(len(kept), 1)
+        self.assertTrue(kept[0] is tasks[0])
 
 
     def testRecurringTasks(self):
@@ -114,6 +122,41 @@ class BaseEventTest(mox.MoxTestBase):
         event.Handle(self.sched, {}, "board1")
 
 
+    def testBoardRestrictedTasks(self):
+        """Tests that tasks restricted to other boards are not Run()."""
+        restricted = FakeTask(*self._TASKS[0], pymox=self.mox,
+                              boards='board2')
+        unrestricted = FakeTask(*self._TASKS[1], pymox=self.mox)
+        unrestricted.CanArm(self.sched)
+        unrestricted.Arm()
+        event = self.CreateEvent()
+        self.mox.ReplayAll()
+
+        event.tasks = [restricted, unrestricted]
+        event.Handle(self.sched, {}, 'board1')
+        self.mox.VerifyAll()
+
+
+    def testForceIgnoresBoardRestrictions(self):
+        """Tests that force=True runs tasks the board index rules out."""
+        lc_task = FakeTask(*self._TASKS[0], pymox=self.mox,
+                           launch_control_targets='shamu-eng')
+        event = self.CreateEvent()
+        event.tasks = [lc_task]
+        self.mox.ReplayAll()
+
+        # Without force, the task's targets exclude board1 entirely.
+        event.Handle(self.sched, {}, 'board1')
+        self.mox.VerifyAll()
+
+        self.mox.ResetAll()
+        lc_task.CanArm(self.sched)
+        lc_task.Arm()
+        self.mox.ReplayAll()
+        event.Handle(self.sched, {}, 'board1', force=True)
+        self.mox.VerifyAll()
+
+
     def testOneShotWithRecurringTasks(self):
         """Tests that one-shot tasks are destroyed correctly."""
         tasks = [FakeTask(*task, pymox=self.mox) for task in self._TASKS]
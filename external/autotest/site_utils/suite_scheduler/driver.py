@@ -62,6 +62,7 @@ class Driver(object):
         @param mv: an instance of ManifestVersions.
         """
         config.reread()
+        base_event.ClearGetbooleanCache()
         new_events = self._CreateEventsWithTasks(config, mv)
         for keyword, event in self._events.iteritems():
             event.Merge(new_events[keyword])
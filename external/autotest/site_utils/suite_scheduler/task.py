@@ -557,6 +557,10 @@ class Task(object):
                           pool, boardsStr, self._file_bugs, numStr,
                           testbed_dut_count_str, time_str))
 
+        # _str doubles as the de-dup identity of the task; precompute its
+        # hash as well so set/dict operations don't recompute it.
+        self._hash = hash(self._str)
+
 
     def _FitsSpec(self, branch):
         """Checks if a branch is deemed OK by this instance's branch specs.
@@ -734,7 +738,17 @@ class Task(object):
 
     def __hash__(self):
         """Allows instances to be correctly deduped when used in a set."""
-        return hash(str(self))
+        return self._hash
+
+
+    def _IdentityKey(self):
+        """Key that identifies this task for de-duping purposes.
+
+        Tasks that compare equal share the same key, so the key can be used
+        to store tasks in a dict without paying for __hash__/__eq__ on every
+        lookup.
+        """
+        return self._str
 
 
     def _GetCrOSBuild(self, mv, board):
@@ -36,11 +36,11 @@ class TimedEvent(base_event.BaseEvent):
 
 
     def __ne__(self, other):
-        return self._deadline != other._deadline or self.tasks != other.tasks
+        return self._deadline != other._deadline or self._tasks != other._tasks
 
 
     def __eq__(self, other):
-        return self._deadline == other._deadline and self.tasks == other.tasks
+        return self._deadline == other._deadline and self._tasks == other._tasks
 
 
     @staticmethod
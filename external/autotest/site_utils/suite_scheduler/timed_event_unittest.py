@@ -14,6 +14,24 @@ import base_event, forgiving_config_parser
 import manifest_versions, task, timed_event
 
 
+class FakeTask(collections.namedtuple('FakeTask', 'hour day')):
+    """Minimal Task stand-in for FilterTasks tests.
+
+    Provides the identity key and board attributes BaseEvent's task
+    storage expects from real Task instances.
+    """
+
+    boards = ()
+    launch_control_targets = ()
+
+
+    def _IdentityKey(self):
+        return self
+
+
+FakeTask.__new__.__defaults__ = (None, None)
+
+
 class TimedEventTestBase(mox.MoxTestBase):
     """Base class for TimedEvent unit test classes."""
 
@@ -265,10 +283,9 @@ class NightlyTest(TimedEventTestBase):
 
     def testFilterTasks(self):
         """Test FilterTasks function can filter tasks by current hour."""
-        Task = collections.namedtuple('Task', 'hour')
-        task_1 = Task(hour=0)
-        task_2 = Task(hour=10)
-        task_3 = Task(hour=11)
+        task_1 = FakeTask(hour=0)
+        task_2 = FakeTask(hour=10)
+        task_3 = FakeTask(hour=11)
         timed_event.TimedEvent._now().MultipleTimes().AndReturn(self.BaseTime())
         self.mox.ReplayAll()
         event = self.CreateEvent()
@@ -398,10 +415,9 @@ class WeeklyTest(TimedEventTestBase):
 
     def testFilterTasks(self):
         """Test FilterTasks function can filter tasks by current day."""
-        Task = collections.namedtuple('Task', 'day')
-        task_1 = Task(day=6)
-        task_2 = Task(day=2)
-        task_3 = Task(day=5)
+        task_1 = FakeTask(day=6)
+        task_2 = FakeTask(day=2)
+        task_3 = FakeTask(day=5)
         timed_event.TimedEvent._now().MultipleTimes().AndReturn(self.BaseTime())
         self.mox.ReplayAll()
         event = self.CreateEvent()